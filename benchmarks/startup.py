@@ -0,0 +1,77 @@
+"""
+Cold start benchmark for the apps in this repo.
+
+Each module is imported in a fresh interpreter several times and the median
+wall time is reported, together with its slowest direct imports from -X importtime.
+Run it from the repo root:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 10 gemini-google/testapp.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = [
+    "claude-anthropic/multibot.py",
+    "claude-anthropic/chatbot.py",
+    "gemini-google/testapp.py",
+]
+
+
+def import_once(path):
+    directory, filename = os.path.split(os.path.join(ROOT, path))
+    module = os.path.splitext(filename)[0]
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, result
+
+
+def slowest_imports(importtime_log, top):
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Only the target's direct imports, deeper ones are already in their parent's cumulative time
+        if len(name) - len(name.lstrip()) != 3:
+            continue
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for target in args.targets:
+        timings = []
+        for _ in range(args.repeat):
+            elapsed, result = import_once(target)
+            if result.returncode != 0:
+                error = result.stderr.strip().splitlines()[-1]
+                print(f"{target}: import failed ({error})")
+                break
+            timings.append(elapsed)
+        else:
+            print(f"{target}: median {statistics.median(timings) * 1000:.0f} ms over {args.repeat} runs")
+            for cumulative_us, name in slowest_imports(result.stderr, args.top):
+                print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,41 @@
 import streamlit as st
 from chatbot import ChatBot
 from config import TASK_SPECIFIC_INSTRUCTIONS
+from chat_view import initialize_conversation, record_turn, recording_context, render_history
 import os
 
 
+SEED_MESSAGES = [
+   {'role': "user", "content": TASK_SPECIFIC_INSTRUCTIONS},
+   {'role': "assistant", "content": "Understood"},
+]
+
+# Claude's context lives in st.session_state.messages and the "claude" store channel
+CONTEXTS = {"messages": ("claude", SEED_MESSAGES)}
+
 
 def main():
    st.title("Chat with Ava, daughter to Bery and Jako🤖")
 
-   if "messages" not in st.session_state:
-       st.session_state.messages = [
-           {'role': "user", "content": TASK_SPECIFIC_INSTRUCTIONS},
-           {'role': "assistant", "content": "Understood"},
-       ]
+   # Restores the model context from the conversation store on a fresh session
+   initialize_conversation(CONTEXTS)
 
    chatbot = ChatBot(st.session_state)
 
-   # Display user and assistant messages skipping the first two
-   for message in st.session_state.messages[2:]:
-       # ignore tool use blocks
-       if isinstance(message["content"], str):
-           with st.chat_message(message["role"]):
-               st.markdown(message["content"])
+   # Display only the most recent user and assistant messages
+   render_history()
 
    if user_msg := st.chat_input("Type your message here..."):
        st.chat_message("user").markdown(user_msg)
 
        with st.chat_message("assistant"):
-           with st.spinner("Ava is thinking..."):
+           with st.spinner("Ava is thinking..."), recording_context(CONTEXTS):
                response_placeholder = st.empty()
                full_response = chatbot.process_user_input(user_msg)
                response_placeholder.markdown(full_response)
 
+       record_turn("user", user_msg)
+       record_turn("assistant", full_response)
+
 if __name__ == "__main__":
    main()
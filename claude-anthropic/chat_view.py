@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+import streamlit as st
+from conversation_store import ConversationStore
+from config import CONVERSATION_DB, CHAT_PAGE_SIZE
+
+
+@st.cache_resource
+def get_store():
+    """One store per process, shared by every session"""
+    return ConversationStore(CONVERSATION_DB)
+
+
+def initialize_conversation(contexts):
+    """
+    Attach the session to a conversation id kept in the URL, and restore each
+    model context from the store the first time a session sees that id.
+
+    `contexts` maps a session_state key to its store channel and seed messages,
+    e.g. {"messages": ("claude", SEED_MESSAGES)}.
+    """
+    store = get_store()
+    if "conversation_id" not in st.session_state:
+        conversation_id = st.query_params.get("cid")
+        if not conversation_id:
+            conversation_id = store.new_conversation_id()
+            st.query_params["cid"] = conversation_id
+        st.session_state.conversation_id = conversation_id
+        for key, (channel, seed) in contexts.items():
+            st.session_state[key] = list(seed) + store.history(conversation_id, channel)
+    if "visible_messages" not in st.session_state:
+        st.session_state.visible_messages = CHAT_PAGE_SIZE
+    return store
+
+
+def start_new_conversation(contexts):
+    store = get_store()
+    st.session_state.conversation_id = store.new_conversation_id()
+    st.query_params["cid"] = st.session_state.conversation_id
+    for key, (_, seed) in contexts.items():
+        st.session_state[key] = list(seed)
+    st.session_state.visible_messages = CHAT_PAGE_SIZE
+
+
+def record_turn(role, content):
+    """Add a turn to the displayed transcript"""
+    get_store().append(st.session_state.conversation_id, role, content)
+
+
+@contextmanager
+def recording_context(contexts):
+    """
+    Persist the text turns the bots append to their session_state histories
+    while the block runs, each to its own channel. Tool use blocks are skipped.
+    """
+    lengths = {key: len(st.session_state[key]) for key in contexts}
+    try:
+        yield
+    finally:
+        store = get_store()
+        for key, (channel, _) in contexts.items():
+            for message in st.session_state[key][lengths[key]:]:
+                if isinstance(message["content"], str):
+                    store.append(
+                        st.session_state.conversation_id,
+                        message["role"],
+                        message["content"],
+                        channel,
+                    )
+
+
+def render_history():
+    """Render only the newest page(s) of the displayed transcript"""
+    store = get_store()
+    conversation_id = st.session_state.conversation_id
+
+    if store.count(conversation_id) > st.session_state.visible_messages:
+        if st.button("Load older messages"):
+            st.session_state.visible_messages += CHAT_PAGE_SIZE
+
+    for message in store.recent(conversation_id, st.session_state.visible_messages):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
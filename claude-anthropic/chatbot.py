@@ -1,9 +1,16 @@
+import time
 from anthropic import Anthropic
-from config import IDENTITY, TOOLS, MODEL, get_quote
+from config import IDENTITY, TOOLS, get_quote
+from router import router
+from singleflight import SingleFlight, make_key
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Shared with MultiChatBot, identical concurrent requests reach upstream once
+claude_calls = SingleFlight.group("claude")
+quote_calls = SingleFlight.group("get_quote")
+
 class ChatBot:
    def __init__(self, session_state):
        self.anthropic = Anthropic()
@@ -14,15 +21,28 @@ class ChatBot:
        messages,
        max_tokens,
    ):
-       try:
+       route, model = router.choose(
+           "claude",
+           messages,
+           override=getattr(self.session_state, "model_override", None),
+       )
+       def create():
+           start = time.perf_counter()
            response = self.anthropic.messages.create(
-               model=MODEL,
+               model=model,
                system=IDENTITY,
                max_tokens=max_tokens,
                messages=messages,
                tools=TOOLS,
            )
+           router.record(
+               "claude", route, model, time.perf_counter() - start,
+               response.usage.input_tokens, response.usage.output_tokens,
+           )
            return response
+
+       try:
+           return claude_calls.do(make_key(model, max_tokens, messages), create)
        except Exception as e:
            return {"error": str(e)}
 
@@ -82,7 +102,7 @@ class ChatBot:
 
    def handle_tool_use(self, func_name, func_params):
        if func_name == "get_quote":
-           premium = get_quote(**func_params)
+           premium = quote_calls.do(make_key(func_params), get_quote, **func_params)
            return f"Quote generated: ${premium:.2f} per month"
       
        raise Exception("An unexpected tool was used")
@@ -1,3 +1,5 @@
+import os
+
 IDENTITY = """You are Ava, a friendly and knowledgeable AI assistant for your parents Bery and Jako. 
 Your role is to warmly welcome guests and provide information on 
 any subject."""
@@ -148,6 +150,30 @@ TOOLS = [{
 }]
 
 MODEL = "claude-3-5-sonnet-20241022"
+GEMINI_MODEL = "gemini-1.5-flash-latest"
+
+# Per-turn model routing: simple turns go to the small model, tool use and long reasoning to the large one
+MODEL_ROUTES = {
+    "claude": {"small": "claude-3-5-haiku-20241022", "large": MODEL},
+    "gemini": {"small": "gemini-1.5-flash-8b-latest", "large": GEMINI_MODEL},
+}
+
+# USD per million (input, output) tokens, used for the router cost stats
+MODEL_PRICES = {
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+    "gemini-1.5-flash-8b-latest": (0.0375, 0.15),
+    "gemini-1.5-flash-latest": (0.075, 0.30),
+}
+
+# Conversation persistence and how many messages the chat view renders per page
+CONVERSATION_DB = "conversations.db"
+CHAT_PAGE_SIZE = 20
+
+# Local CPU model (GGUF file for llama.cpp) used as the third MultiChatBot provider
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "models/local-model.gguf")
+LOCAL_CONTEXT_SIZE = 4096
+LOCAL_THREADS = os.cpu_count()
 
 def get_quote(make, model, year, mileage, driver_age):
     """Returns the premium per month in USD"""
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class ConversationStore:
+    """
+    Append-only SQLite store for chat turns.
+
+    Each turn is written exactly once and read back in pages, so the Streamlit
+    apps only have to render the newest messages on every rerun. Turns are kept per
+    channel: "display" holds what the chat shows, while "claude", "gemini" and
+    "local" hold each provider's own model context.
+    """
+
+    def __init__(self, path="conversations.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                channel TEXT NOT NULL DEFAULT 'display'
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_conversation_channel "
+            "ON messages (conversation_id, channel, id)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def new_conversation_id():
+        return uuid.uuid4().hex
+
+    def append(self, conversation_id, role, content, channel="display"):
+        """Append a single text turn and return its row id"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO messages (conversation_id, role, content, created_at, channel) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (conversation_id, role, content, time.time(), channel),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def count(self, conversation_id, channel="display"):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation_id = ? AND channel = ?",
+                (conversation_id, channel),
+            ).fetchone()
+        return row[0]
+
+    def recent(self, conversation_id, limit, channel="display"):
+        """
+        Return the newest `limit` messages of a channel in chronological order
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE conversation_id = ? AND channel = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (conversation_id, channel, limit),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def history(self, conversation_id, channel="display"):
+        """Return a whole channel of the conversation in chronological order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE conversation_id = ? AND channel = ? "
+                "ORDER BY id",
+                (conversation_id, channel),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,88 @@
+import queue
+import threading
+from config import LOCAL_MODEL_PATH, LOCAL_CONTEXT_SIZE, LOCAL_THREADS
+
+
+class _Request:
+    def __init__(self, messages, max_tokens):
+        self.messages = messages
+        self.max_tokens = max_tokens
+        self.chunks = queue.Queue()
+        self.cancelled = threading.Event()
+
+
+class LocalModel:
+    """
+    llama.cpp model running on the CPU, shared by every session in the process.
+
+    The model is loaded once on first use. A single worker thread owns the model
+    (llama.cpp contexts are not thread safe), so concurrent requests are serialized
+    in arrival order. A request whose reader has gone away, e.g. after a Streamlit
+    rerun, stops generating at the next chunk. A RAM prompt cache keeps the KV state
+    of earlier turns, so each new turn only evaluates the new tokens.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, model_path=LOCAL_MODEL_PATH, n_ctx=LOCAL_CONTEXT_SIZE, n_threads=LOCAL_THREADS):
+        from llama_cpp import Llama, LlamaRAMCache
+
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        self.llm.set_cache(LlamaRAMCache())
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def get(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if not request.cancelled.is_set():
+                self._serve(request)
+
+    def _serve(self, request):
+        try:
+            # Always stream internally so an abandoned request can be stopped early
+            response = self.llm.create_chat_completion(
+                messages=request.messages,
+                max_tokens=request.max_tokens,
+                stream=True,
+            )
+            for chunk in response:
+                if request.cancelled.is_set():
+                    response.close()
+                    break
+                text = chunk["choices"][0]["delta"].get("content")
+                if text:
+                    request.chunks.put(text)
+        except Exception as e:
+            request.chunks.put(e)
+        request.chunks.put(None)
+
+    def _submit(self, messages, max_tokens):
+        request = _Request(messages, max_tokens)
+        self._requests.put(request)
+        try:
+            while True:
+                chunk = request.chunks.get()
+                if chunk is None:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            # Reached when the caller drops the generator too, e.g. on a rerun
+            request.cancelled.set()
+
+    def generate(self, messages, max_tokens):
+        return "".join(self._submit(messages, max_tokens))
+
+    def stream(self, messages, max_tokens):
+        yield from self._submit(messages, max_tokens)
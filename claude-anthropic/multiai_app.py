@@ -1,17 +1,28 @@
 import streamlit as st
 from multibot import MultiChatBot
+from router import router
+from singleflight import SingleFlight
 from config import TASK_SPECIFIC_INSTRUCTIONS
+from chat_view import (
+    initialize_conversation, start_new_conversation, record_turn, recording_context, render_history
+)
+
+SEED_MESSAGES = [
+    {'role': "user", "content": TASK_SPECIFIC_INSTRUCTIONS},
+    {'role': "assistant", "content": "Understood"},
+]
+
+# Each provider keeps its own context, separate from the displayed transcript
+CONTEXTS = {
+    "messages": ("claude", SEED_MESSAGES),
+    "gemini_history": ("gemini", []),
+    "local_history": ("local", []),
+}
 
 def initialize_session_state():
-    if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {'role': "user", "content": TASK_SPECIFIC_INSTRUCTIONS},
-            {'role': "assistant", "content": "Understood"},
-        ]
+    initialize_conversation(CONTEXTS)
     if "chat_mode" not in st.session_state:
         st.session_state.chat_mode = "both"
-    if "gemini_history" not in st.session_state:
-        st.session_state.gemini_history = []
     if "show_ai_dialogue" not in st.session_state:
         st.session_state.show_ai_dialogue = False
 
@@ -28,6 +39,19 @@ def format_response(response, chat_mode):
         
         🟢 **Gemini**: {gemini_resp.replace('Gemini: ', '')}
         """
+    elif chat_mode == "all":
+        responses = response.split("\n")
+        claude_resp = next((r for r in responses if r.startswith("Claude:")), "Claude: No response")
+        gemini_resp = next((r for r in responses if r.startswith("Gemini:")), "Gemini: No response")
+        local_resp = next((r for r in responses if r.startswith("Local:")), "Local: No response")
+
+        return f"""
+        🔵 **Claude**: {claude_resp.replace('Claude: ', '')}
+        
+        🟢 **Gemini**: {gemini_resp.replace('Gemini: ', '')}
+        
+        🟣 **Local**: {local_resp.replace('Local: ', '')}
+        """
     else:
         return response
 
@@ -42,7 +66,7 @@ def main():
         st.header("Chat Settings")
         chat_mode = st.radio(
             "Choose who to chat with:",
-            ["Both AIs", "Claude Only", "Gemini Only"],
+            ["Both AIs", "Claude Only", "Gemini Only", "Local Only", "All AIs"],
             key="chat_mode_radio"
         )
         
@@ -50,39 +74,52 @@ def main():
         mode_mapping = {
             "Both AIs": "both",
             "Claude Only": "claude",
-            "Gemini Only": "gemini"
+            "Gemini Only": "gemini",
+            "Local Only": "local",
+            "All AIs": "all",
         }
         st.session_state.chat_mode = mode_mapping[chat_mode]
+
+        model_size = st.radio(
+            "Model size:",
+            ["Auto", "Small", "Large"],
+            horizontal=True,
+            key="model_size_radio"
+        )
+        # "Auto" lets the router pick per turn, the others pin every turn
+        st.session_state.model_override = None if model_size == "Auto" else model_size.lower()
         
         if st.button("Start AI-to-AI Dialogue"):
             st.session_state.show_ai_dialogue = True
             
         if st.button("Clear Chat History"):
-            st.session_state.messages = [
-                {'role': "user", "content": TASK_SPECIFIC_INSTRUCTIONS},
-                {'role': "assistant", "content": "Understood"},
-            ]
-            st.session_state.gemini_history = []
+            start_new_conversation(CONTEXTS)
             st.rerun()
 
+        with st.expander("Routing stats"):
+            st.json(router.stats())
+
+        with st.expander("Request coalescing"):
+            st.json(SingleFlight.stats())
+
     # Initialize chat system
     chat_system = MultiChatBot(st.session_state)
 
-    # Display chat messages
-    for message in st.session_state.messages[2:]:
-        if isinstance(message["content"], str):
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
+    # Display the most recent chat messages
+    render_history()
 
     # Handle AI-to-AI dialogue
     if st.session_state.show_ai_dialogue:
         st.subheader("AI-to-AI Dialogue")
         topic = st.text_input("Enter a topic for the AIs to discuss:")
         num_turns = st.slider("Number of dialogue turns:", 1, 5, 3)
+        partner = st.radio("Claude talks with:", ["Gemini", "Local"], horizontal=True)
         
         if st.button("Generate Dialogue"):
-            with st.spinner("Generating AI dialogue..."):
-                dialogue = chat_system.ai_dialogue(topic, turns=num_turns)
+            with st.spinner("Generating AI dialogue..."), recording_context(CONTEXTS):
+                dialogue = chat_system.ai_dialogue(
+                    topic, turns=num_turns, partner_ai=partner.lower()
+                )
                 # Split the dialogue into lines and format each one
                 dialogue_lines = dialogue.split('\n')
                 for line in dialogue_lines:
@@ -91,6 +128,8 @@ def main():
                             st.markdown(f"🔵 {line}")
                         elif line.startswith('Gemini:'):
                             st.markdown(f"🟢 {line}")
+                        elif line.startswith('Local:'):
+                            st.markdown(f"🟣 {line}")
                         else:
                             st.markdown(line)
                 st.session_state.show_ai_dialogue = False
@@ -99,19 +138,26 @@ def main():
     if user_msg := st.chat_input("Type your message here..."):
         st.chat_message("user").markdown(user_msg)
         
-        with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response_placeholder = st.empty()
+        with st.chat_message("assistant"), recording_context(CONTEXTS):
+            if st.session_state.chat_mode == "local":
+                # The local model streams tokens as soon as they are generated
+                formatted_response = st.write_stream(chat_system.stream_local_message(user_msg))
+            else:
+                with st.spinner("Thinking..."):
+                    response_placeholder = st.empty()
                 
-                # Process message based on selected mode
-                response = chat_system.process_conversation(
-                    user_msg, 
-                    target_ai=st.session_state.chat_mode
-                )
+                    # Process message based on selected mode
+                    response = chat_system.process_conversation(
+                        user_msg, 
+                        target_ai=st.session_state.chat_mode
+                    )
                 
-                # Format and display response
-                formatted_response = format_response(response, st.session_state.chat_mode)
-                response_placeholder.markdown(formatted_response)
+                    # Format and display response
+                    formatted_response = format_response(response, st.session_state.chat_mode)
+                    response_placeholder.markdown(formatted_response)
+
+        record_turn("user", user_msg)
+        record_turn("assistant", formatted_response)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
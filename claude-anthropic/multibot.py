@@ -1,58 +1,157 @@
 import os
-from anthropic import Anthropic
-import google.generativeai as genai
-from config import IDENTITY, TOOLS, MODEL, get_quote
+import time
+from config import IDENTITY, TOOLS, MODEL_ROUTES, get_quote
+from router import router
+from singleflight import SingleFlight, make_key
+from local_backend import LocalModel
 from dotenv import load_dotenv
 
 
 
 load_dotenv()
 
+# Same groups as ChatBot, identical concurrent requests reach upstream once
+claude_calls = SingleFlight.group("claude")
+quote_calls = SingleFlight.group("get_quote")
+local_calls = SingleFlight.group("local")
+
 class MultiChatBot:
+    # Provider clients are created on first use and shared by every instance,
+    # so a "Claude Only" session never imports the Gemini SDK and vice versa
+    _anthropic = None
+    _gemini_models = None
+
     def __init__(self, session_state):
-        # Initialize both AI clients
-        self.anthropic = Anthropic()
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.gemini_model = genai.GenerativeModel('gemini-1.5-flash-latest')
-        
         # Initialize chat sessions
         self.session_state = session_state
-        self.gemini_chat = self.gemini_model.start_chat(history=[])
+        self.gemini_chat = None
         
         # Initialize conversation history for both AIs
         if not hasattr(self.session_state, 'messages'):
             self.session_state.messages = []
         if not hasattr(self.session_state, 'gemini_history'):
             self.session_state.gemini_history = []
+        if not hasattr(self.session_state, 'local_history'):
+            self.session_state.local_history = []
+
+    @property
+    def anthropic(self):
+        if MultiChatBot._anthropic is None:
+            from anthropic import Anthropic
+
+            MultiChatBot._anthropic = Anthropic()
+        return MultiChatBot._anthropic
+
+    @property
+    def gemini_models(self):
+        if MultiChatBot._gemini_models is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+            MultiChatBot._gemini_models = {
+                route: genai.GenerativeModel(name)
+                for route, name in MODEL_ROUTES["gemini"].items()
+            }
+        return MultiChatBot._gemini_models
+
+    def _model_override(self):
+        return getattr(self.session_state, "model_override", None)
 
     def generate_claude_message(self, messages, max_tokens):
-        try:
+        route, model = router.choose(
+            "claude", messages, override=self._model_override()
+        )
+        def create():
+            start = time.perf_counter()
             response = self.anthropic.messages.create(
-                model=MODEL,
+                model=model,
                 system=IDENTITY,
                 max_tokens=max_tokens,
                 messages=messages,
                 tools=TOOLS,
             )
+            router.record(
+                "claude", route, model, time.perf_counter() - start,
+                response.usage.input_tokens, response.usage.output_tokens,
+            )
             return response
+
+        try:
+            return claude_calls.do(make_key(model, max_tokens, messages), create)
         except Exception as e:
             return {"error": str(e)}
 
+    def _gemini_seed_history(self):
+        """Gemini's own earlier turns, e.g. restored from the conversation store"""
+        return [
+            {"role": "model" if turn["role"] == "assistant" else "user", "parts": [turn["content"]]}
+            for turn in self.session_state.gemini_history
+        ]
+
     def generate_gemini_message(self, message):
+        route, model = router.choose(
+            "gemini",
+            self.session_state.gemini_history + [{"role": "user", "content": message}],
+            override=self._model_override(),
+        )
         try:
+            # Continue the same history on whichever model the router picked
+            self.gemini_chat = self.gemini_models[route].start_chat(
+                history=self.gemini_chat.history if self.gemini_chat else self._gemini_seed_history()
+            )
+            start = time.perf_counter()
             response = self.gemini_chat.send_message(message)
+            router.record(
+                "gemini", route, model, time.perf_counter() - start,
+                response.usage_metadata.prompt_token_count,
+                response.usage_metadata.candidates_token_count,
+            )
             return response.text
         except Exception as e:
             return f"Gemini Error: {str(e)}"
 
+    def _local_messages(self, user_input):
+        return (
+            [{"role": "system", "content": IDENTITY}]
+            + self.session_state.local_history
+            + [{"role": "user", "content": user_input}]
+        )
+
+    def generate_local_message(self, user_input, max_tokens=2048):
+        try:
+            messages = self._local_messages(user_input)
+            return local_calls.do(
+                make_key(messages, max_tokens), LocalModel.get().generate, messages, max_tokens
+            )
+        except Exception as e:
+            return f"Local Error: {str(e)}"
+
+    def stream_local_message(self, user_input, max_tokens=2048):
+        """
+        Yield the local model's reply chunk by chunk and record the full turn once done
+        """
+        chunks = []
+        try:
+            for chunk in LocalModel.get().stream(self._local_messages(user_input), max_tokens):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            yield f"Local Error: {str(e)}"
+            return
+        self._record_local_turn(user_input, "".join(chunks))
+
+    def _record_local_turn(self, user_input, response):
+        self.session_state.local_history.append({"role": "user", "content": user_input})
+        self.session_state.local_history.append({"role": "assistant", "content": response})
+
     def process_conversation(self, user_input, target_ai="both"):
         """
         Process conversation with specified AI(s)
-        target_ai options: "claude", "gemini", "both"
+        target_ai options: "claude", "gemini", "local", "both", "all"
         """
         responses = []
         
-        if target_ai in ["claude", "both"]:
+        if target_ai in ["claude", "both", "all"]:
             # Get Claudes response
             self.session_state.messages.append({"role": "user", "content": user_input})
             claude_response = self.generate_claude_message(
@@ -69,7 +168,7 @@ class MultiChatBot:
                     {"role": "assistant", "content": claude_text}
                 )
 
-        if target_ai in ["gemini", "both"]:
+        if target_ai in ["gemini", "both", "all"]:
             try:
                 # Get Geminis response
                 gemini_response = self.generate_gemini_message(user_input)
@@ -85,19 +184,30 @@ class MultiChatBot:
             except Exception as e:
                 responses.append(f"Gemini: Error - {str(e)}")
 
+        if target_ai in ["local", "all"]:
+            local_response = self.generate_local_message(user_input)
+            responses.append(f"Local: {local_response}")
+            if not local_response.startswith("Local Error:"):
+                self._record_local_turn(user_input, local_response)
+
         # For single AI responses, return without the prefix
         if target_ai == "claude":
             return responses[0] if responses else "Claude: No response"
         elif target_ai == "gemini":
             return responses[0] if responses else "Gemini: No response"
+        elif target_ai == "local":
+            return responses[0] if responses else "Local: No response"
         
         # Join responses with newlines if there are multiple
         return "\n".join(responses) if responses else "No response received"
 
-    def ai_dialogue(self, topic, turns=3):
+    def ai_dialogue(self, topic, turns=3, partner_ai="gemini"):
         """
-        Generate a dialogue between Claude and Gemini on a specific topic with consistent formatting
+        Generate a dialogue between Claude and a partner AI on a specific topic with consistent formatting
+        partner_ai options: "gemini", "local"
         """
+        partner_name = {"gemini": "Gemini", "local": "Local"}[partner_ai]
+
         # Start with the topic header
         dialogue_parts = [f"Starting AI dialogue on topic: {topic}\n"]
         previous_message = topic
@@ -111,23 +221,23 @@ class MultiChatBot:
             claude_text = claude_response.replace("Claude: ", "")
             dialogue_parts.append(f"Claude: {claude_text}")
             
-            # Use Claudes response as input for Gemini
-            gemini_prompt = (f"You are in a dialogue about '{topic}'. "
+            # Use Claudes response as input for the partner
+            partner_prompt = (f"You are in a dialogue about '{topic}'. "
                             f"Respond to Claude's message: '{claude_text}'. "
                             f"Be concise and engaging.")
             
-            gemini_response = self.process_conversation(gemini_prompt, "gemini")
-            gemini_text = gemini_response.replace("Gemini: ", "")
-            dialogue_parts.append(f"Gemini: {gemini_text}\n")
+            partner_response = self.process_conversation(partner_prompt, partner_ai)
+            partner_text = partner_response.replace(f"{partner_name}: ", "")
+            dialogue_parts.append(f"{partner_name}: {partner_text}\n")
             
             # Update previous message for next turn
-            previous_message = gemini_text
+            previous_message = partner_text
         
         # Join all parts with consistent formatting
         return "\n".join(dialogue_parts)
 
     def handle_tool_use(self, func_name, func_params):
         if func_name == "get_quote":
-            premium = get_quote(**func_params)
+            premium = quote_calls.do(make_key(func_params), get_quote, **func_params)
             return f"Quote generated: ${premium:.2f} per month"
         raise Exception("An unexpected tool was used")
\ No newline at end of file
@@ -0,0 +1,111 @@
+import re
+import threading
+from config import MODEL_ROUTES, MODEL_PRICES
+
+# Words that usually mean the quote tool is needed or the answer needs real reasoning
+TOOL_HINTS = re.compile(
+    r"\b(quote|premium|insur\w*|mileage|miles|year|vehicle|car|driver)\b", re.IGNORECASE
+)
+REASONING_HINTS = re.compile(
+    r"\b(why|explain|compare|analy[sz]e|step by step|calculate|prove|code|debug|plan|summari[sz]e|write)\b",
+    re.IGNORECASE,
+)
+LONG_TURN_WORDS = 40
+# How many earlier turns are checked for an ongoing tool flow, e.g. collecting quote details
+CONTEXT_TURNS = 4
+
+
+def classify(text):
+    """
+    Cheap local heuristic deciding whether a single turn needs the large model.
+    Returns "small" or "large".
+    """
+    if len(text.split()) > LONG_TURN_WORDS or text.count("?") > 1:
+        return "large"
+    if TOOL_HINTS.search(text) or REASONING_HINTS.search(text):
+        return "large"
+    return "small"
+
+
+def _has_tool_blocks(content):
+    """True for Anthropic content lists holding tool_use or tool_result blocks"""
+    if isinstance(content, str):
+        return False
+    for block in content:
+        kind = block.get("type") if isinstance(block, dict) else getattr(block, "type", None)
+        if kind in ("tool_use", "tool_result"):
+            return True
+    return False
+
+
+def classify_turn(messages):
+    """
+    Classify the latest user turn of `messages` together with the turns just before it.
+
+    A turn that answers the assistant's questions ("Toyota Camry 2020, 30000 miles")
+    says little on its own, so the large model is kept while a tool flow is going on:
+    the latest or an earlier turn holds tool blocks, or the recent turns mention
+    quote details.
+    """
+    if not messages:
+        return "small"
+    latest = messages[-1]
+    if _has_tool_blocks(latest["content"]):
+        return "large"
+
+    recent = messages[-(CONTEXT_TURNS + 1):-1]
+    for message in recent:
+        content = message["content"]
+        if _has_tool_blocks(content) or (isinstance(content, str) and TOOL_HINTS.search(content)):
+            return "large"
+    return classify(latest["content"])
+
+
+class ModelRouter:
+    """
+    Picks the cheapest adequate model per turn and keeps per-route latency and cost stats
+    """
+
+    def __init__(self, routes=MODEL_ROUTES, prices=MODEL_PRICES):
+        self.routes = routes
+        self.prices = prices
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def choose(self, provider, messages, override=None):
+        """
+        Return (route, model) for the latest turn of `messages`, a list of
+        {"role", "content"} dicts. `override` forces "small" or "large".
+        """
+        if override in ("small", "large"):
+            route = override
+        else:
+            route = classify_turn(messages)
+        return route, self.routes[provider][route]
+
+    def record(self, provider, route, model, latency, input_tokens=0, output_tokens=0):
+        input_price, output_price = self.prices.get(model, (0.0, 0.0))
+        cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        with self._lock:
+            stats = self._stats.setdefault(
+                (provider, route),
+                {"model": model, "calls": 0, "latency": 0.0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0},
+            )
+            stats["model"] = model
+            stats["calls"] += 1
+            stats["latency"] += latency
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            stats["cost"] += cost
+
+    def stats(self):
+        """Per-route totals plus the average latency in seconds"""
+        with self._lock:
+            return {
+                f"{provider}/{route}": dict(values, avg_latency=values["latency"] / values["calls"])
+                for (provider, route), values in self._stats.items()
+            }
+
+
+# Shared by every session in the process so the stats cover all traffic
+router = ModelRouter()
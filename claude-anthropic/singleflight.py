@@ -0,0 +1,86 @@
+import hashlib
+import json
+import threading
+
+
+def make_key(*parts):
+    """Stable key for a request, built from anything JSON can describe."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests into a single upstream call.
+
+    The first caller for a key runs the request, every caller that arrives with the
+    same key while it is in flight waits for that result instead of issuing its own.
+    Nothing is cached once the call has finished.
+
+    Use `SingleFlight.group(name)` to share one instance per kind of request across
+    modules, and `SingleFlight.stats()` to see how much load was coalesced.
+    """
+
+    _groups = {}
+    _groups_lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counts = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    @classmethod
+    def group(cls, name):
+        with cls._groups_lock:
+            if name not in cls._groups:
+                cls._groups[name] = cls(name)
+            return cls._groups[name]
+
+    @classmethod
+    def stats(cls):
+        """Per group calls, upstream executions, coalesced calls and the coalescing ratio"""
+        with cls._groups_lock:
+            groups = list(cls._groups.values())
+        return {group.name: group.counts() for group in groups}
+
+    def counts(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts["coalescing_ratio"] = counts["coalesced"] / counts["calls"] if counts["calls"] else 0.0
+        return counts
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self._counts["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counts["executions"] += 1
+            else:
+                self._counts["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,110 @@
+import threading
+from collections import deque
+import flet as ft
+
+
+class ChatPanel:
+    """
+    Chat panel built on a virtualized ft.ListView.
+
+    Only the newest `max_live` messages are kept as live controls. Older ones are
+    paged out to a lightweight log of (kind, text) pairs and can be paged back in
+    on demand; while older pages are shown the view stops following new messages,
+    and those pages do not count towards `max_live` until the user jumps back to
+    the latest messages. Appends are coalesced into a single update every
+    `flush_interval` seconds, and only the panel subtree is sent to the client.
+    """
+
+    def __init__(self, max_live=200, page_size=50, flush_interval=0.1, height=400, max_archived=10000):
+        self.max_live = max_live
+        self.page_size = page_size
+        self.flush_interval = flush_interval
+
+        self.archive = deque(maxlen=max_archived)
+        self._live = deque()
+        self._paged_in = 0
+        self._lock = threading.Lock()
+        self._timer = None
+
+        self.view = ft.ListView(spacing=5, auto_scroll=True, height=height)
+        self.older_button = ft.TextButton(
+            "Show earlier messages",
+            on_click=self.load_older,
+            visible=False,
+        )
+        self.latest_button = ft.TextButton(
+            "Jump to latest messages",
+            on_click=self.show_latest,
+            visible=False,
+        )
+        self.control = ft.Column([self.older_button, self.view, self.latest_button])
+
+    @staticmethod
+    def _build(kind, text):
+        if kind == "markdown":
+            return ft.Markdown(text)
+        return ft.Text(text)
+
+    def add_text(self, text):
+        self._append("text", text)
+
+    def add_markdown(self, text):
+        self._append("markdown", text)
+
+    def _append(self, kind, text):
+        with self._lock:
+            self._live.append((kind, text))
+            self.view.controls.append(self._build(kind, text))
+            self._trim()
+        self._schedule_flush()
+
+    def _trim(self):
+        """Archive the oldest live messages beyond `max_live` plus the paged-in history"""
+        while len(self._live) > self.max_live + self._paged_in:
+            self.archive.append(self._live.popleft())
+            self.view.controls.pop(0)
+        self.older_button.visible = bool(self.archive)
+
+    def load_older(self, e=None):
+        """Page the most recent archived messages back into the live view"""
+        with self._lock:
+            restored = []
+            while self.archive and len(restored) < self.page_size:
+                restored.append(self.archive.pop())
+            restored.reverse()
+            self._live.extendleft(reversed(restored))
+            self.view.controls[0:0] = [self._build(kind, text) for kind, text in restored]
+            self._paged_in += len(restored)
+            # Keep the reader's place instead of jumping to every new message
+            self.view.auto_scroll = False
+            self.latest_button.visible = True
+            self.older_button.visible = bool(self.archive)
+        self.flush()
+
+    def show_latest(self, e=None):
+        """Page the browsed history back out and follow new messages again"""
+        with self._lock:
+            self._paged_in = 0
+            self._trim()
+            self.view.auto_scroll = True
+            self.latest_button.visible = False
+        self.flush()
+        if self.control.page is not None:
+            self.view.scroll_to(offset=-1)
+
+    def _schedule_flush(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Push pending changes to the client now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self.control.page is not None:
+            self.control.update()
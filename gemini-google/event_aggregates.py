@@ -0,0 +1,106 @@
+import datetime
+import threading
+from collections import Counter
+
+DIMENSIONS = ("type", "location", "day")
+
+
+class EventAggregates:
+    """
+    Police event counts by type x location x day, maintained as events are ingested.
+
+    Analytical questions are answered from this small table instead of sending every
+    matching event to the model. An event that changes type or location between two
+    fetches is moved to its new cell, and days older than `retention_days` are dropped.
+
+    Args:
+        retention_days (int): How many days back the table keeps counts for.
+    """
+
+    def __init__(self, retention_days=90):
+        self.retention_days = retention_days
+        self._counts = Counter()
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, events):
+        """
+        Count new or changed events.
+
+        Args:
+            events (iterable): (event_id, event_type, location, day) tuples, day as YYYY-MM-DD.
+        """
+        with self._lock:
+            for key, kind, location, day in events:
+                cell = (kind, location, day)
+                previous = self._events.get(key)
+                if previous == cell:
+                    continue
+                if previous is not None:
+                    self._counts[previous] -= 1
+                    if not self._counts[previous]:
+                        del self._counts[previous]
+                self._events[key] = cell
+                self._counts[cell] += 1
+            self._prune()
+
+    def _prune(self):
+        if not self._counts:
+            return
+        latest = max(datetime.date.fromisoformat(day) for _, _, day in self._counts)
+        cutoff = (latest - datetime.timedelta(days=self.retention_days)).isoformat()
+        for cell in [cell for cell in self._counts if cell[2] < cutoff]:
+            del self._counts[cell]
+        self._events = {key: cell for key, cell in self._events.items() if cell[2] >= cutoff}
+
+    def types(self):
+        with self._lock:
+            return sorted({kind for kind, _, _ in self._counts})
+
+    def locations(self):
+        with self._lock:
+            return sorted({location for _, location, _ in self._counts})
+
+    def query(self, group_by=("type",), types=None, locations=None, date_from=None, date_to=None, top_k=None):
+        """
+        Grouped event counts, largest first.
+
+        Args:
+            group_by (iterable): Any of "type", "location" and "day".
+            types (iterable): Only count these event types.
+            locations (iterable): Only count these locations.
+            date_from (str): First day to include, YYYY-MM-DD.
+            date_to (str): Last day to include, YYYY-MM-DD.
+            top_k (int): Only return the `top_k` largest groups.
+
+        Returns:
+            dict: The total count and a list of groups with their counts.
+        """
+        unknown = [dimension for dimension in group_by if dimension not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Cannot group by {unknown}, use any of {list(DIMENSIONS)}")
+        types = set(types) if types else None
+        locations = set(locations) if locations else None
+        positions = [DIMENSIONS.index(dimension) for dimension in group_by]
+
+        grouped = Counter()
+        total = 0
+        with self._lock:
+            for cell, count in self._counts.items():
+                kind, location, day = cell
+                if types is not None and kind not in types:
+                    continue
+                if locations is not None and location not in locations:
+                    continue
+                if date_from and day < date_from:
+                    continue
+                if date_to and day > date_to:
+                    continue
+                grouped[tuple(cell[position] for position in positions)] += count
+                total += count
+
+        groups = [
+            dict(zip(group_by, group), count=count)
+            for group, count in grouped.most_common(top_k)
+        ]
+        return {"total": total, "groups": groups}
@@ -0,0 +1,130 @@
+import threading
+
+SECONDS_PER_HOUR = 3600
+
+
+class HourlyEventCounts:
+    """
+    Per-hour event counts, in total and per event type, kept in a fixed-size ring buffer.
+
+    Events are counted once as they are ingested, so redrawing the chart never has
+    to go back to the raw feed. Hours that fall out of the window are recycled.
+
+    Args:
+        hours (int): Length of the window, four weeks by default.
+    """
+
+    def __init__(self, hours=24 * 7 * 4):
+        self.hours = hours
+        self._totals = [0] * hours
+        self._by_type = {}
+        self._latest_hour = None
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def _clear_slot(self, hour):
+        slot = hour % self.hours
+        self._totals[slot] = 0
+        for counts in self._by_type.values():
+            counts[slot] = 0
+
+    def _advance(self, hour):
+        """Move the head of the window forward to `hour`, clearing recycled slots."""
+        if self._latest_hour is None:
+            self._latest_hour = hour
+            return
+        if hour <= self._latest_hour:
+            return
+        for stale in range(max(self._latest_hour + 1, hour - self.hours + 1), hour + 1):
+            self._clear_slot(stale)
+        self._latest_hour = hour
+        oldest = hour - self.hours + 1
+        self._seen = {key: seen_hour for key, seen_hour in self._seen.items() if seen_hour >= oldest}
+
+    def ingest(self, events):
+        """
+        Count new events.
+
+        Args:
+            events (iterable): (event_id, unix_timestamp, event_type) tuples. Events that were
+                already counted or are older than the window are skipped.
+
+        Returns:
+            int: Number of events counted.
+        """
+        events = [(key, int(timestamp // SECONDS_PER_HOUR), kind) for key, timestamp, kind in events]
+        counted = 0
+        with self._lock:
+            if events:
+                self._advance(max(hour for _, hour, _ in events))
+            oldest = self._latest_hour - self.hours + 1 if self._latest_hour is not None else 0
+            for key, hour, kind in events:
+                if key in self._seen or hour < oldest:
+                    continue
+                self._seen[key] = hour
+                slot = hour % self.hours
+                self._totals[slot] += 1
+                self._by_type.setdefault(kind, [0] * self.hours)[slot] += 1
+                counted += 1
+        return counted
+
+    def types(self):
+        with self._lock:
+            return sorted(kind for kind, counts in self._by_type.items() if any(counts))
+
+    def series(self, kind=None):
+        """
+        Hourly counts over the window, oldest first.
+
+        Returns:
+            list: (hour, count) tuples, where hour is hours since the epoch.
+        """
+        with self._lock:
+            if self._latest_hour is None:
+                return []
+            counts = self._totals if kind is None else self._by_type.get(kind, [0] * self.hours)
+            start = self._latest_hour - self.hours + 1
+            return [(hour, counts[hour % self.hours]) for hour in range(start, self._latest_hour + 1)]
+
+
+def lttb(points, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, for every bucket in between, the point that
+    forms the largest triangle with its neighbours, so peaks survive the reduction.
+
+    Args:
+        points (list): (x, y) tuples sorted by x.
+        threshold (int): Number of points to return.
+
+    Returns:
+        list: The selected (x, y) tuples.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+
+        px, py = points[previous]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((px - avg_x) * (y - py) - (px - x) * (avg_y - py))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        previous = best
+    sampled.append(points[-1])
+    return sampled
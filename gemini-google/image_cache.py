@@ -0,0 +1,166 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+
+class ImageCache:
+    """
+    On-disk cache for Trafikverket camera photos, served by Flet from the assets dir.
+
+    Each photo is downloaded once per (url, PhotoTime). When a camera publishes a new
+    PhotoTime the previous copy is revalidated with a conditional GET, so unchanged
+    images are not transferred again. Resized thumbnails are generated locally and
+    the whole directory is kept under `max_bytes` with least-recently-used eviction.
+
+    Args:
+        root (str): Directory to store the images in, inside the Flet assets dir.
+        url_prefix (str): Path the assets dir exposes `root` under.
+        max_bytes (int): Size bound of the directory.
+    """
+
+    def __init__(self, root, url_prefix="/camera_cache", max_bytes=200 * 1024 * 1024, timeout=10):
+        self.root = root
+        self.url_prefix = url_prefix
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._files = None
+        self._total = 0
+        self._latest = {}
+        self._lock = threading.Lock()
+        # A fixed set of locks striped by key, so locking never grows with the cache
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def _load(self):
+        """Index what earlier processes left on disk, oldest access first."""
+        os.makedirs(self.root, exist_ok=True)
+        entries = []
+        sidecars = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            if name.endswith(".jpg"):
+                entries.append((stat.st_mtime, name, stat.st_size))
+            elif name.endswith(".json"):
+                sidecars.append((stat.st_mtime, name))
+        # The newest sidecar per url is what the next conditional GET revalidates
+        for _, name in sorted(sidecars):
+            with open(os.path.join(self.root, name)) as f:
+                self._latest[json.load(f)["url"]] = name[:-5]
+        self._files = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self._total = sum(self._files.values())
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _touch(self, name):
+        with self._lock:
+            self._files.move_to_end(name)
+        os.utime(self._path(name))
+
+    def _add(self, name, size):
+        with self._lock:
+            self._total += size - self._files.pop(name, 0)
+            self._files[name] = size
+            while self._total > self.max_bytes and len(self._files) > 1:
+                evicted, evicted_size = self._files.popitem(last=False)
+                self._total -= evicted_size
+                for path in (self._path(evicted), self._path(evicted[:-4] + ".json")):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def _key_lock(self, key):
+        return self._key_locks[int(key[:8], 16) % len(self._key_locks)]
+
+    def _write(self, name, data):
+        tmp = self._path(name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+        self._add(name, len(data))
+
+    def _fetch(self, url, key):
+        import requests
+
+        headers = {}
+        previous = self._latest.get(url)
+        previous_meta = {}
+        if previous and os.path.exists(self._path(previous + ".json")):
+            with open(self._path(previous + ".json")) as f:
+                previous_meta = json.load(f)
+            if previous_meta.get("etag"):
+                headers["If-None-Match"] = previous_meta["etag"]
+            if previous_meta.get("last_modified"):
+                headers["If-Modified-Since"] = previous_meta["last_modified"]
+
+        response = requests.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and os.path.exists(self._path(previous + ".jpg")):
+            # Unchanged upstream, so the new key shares the previous file instead of copying it
+            try:
+                os.link(self._path(previous + ".jpg"), self._path(key + ".jpg"))
+            except OSError:
+                shutil.copyfile(self._path(previous + ".jpg"), self._path(key + ".jpg"))
+            self._add(key + ".jpg", os.path.getsize(self._path(key + ".jpg")))
+            meta = previous_meta
+        else:
+            if response.status_code == 304:
+                # The copy we revalidated against was evicted meanwhile
+                response = requests.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            self._write(key + ".jpg", response.content)
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        with open(self._path(key + ".json"), "w") as f:
+            json.dump(meta, f)
+
+    def _thumbnail(self, key, width):
+        try:
+            from PIL import Image
+        except ImportError:
+            # Without Pillow the original is served as is
+            return key + ".jpg"
+
+        name = f"{key}_w{width}.jpg"
+        with Image.open(self._path(key + ".jpg")) as image:
+            image.thumbnail((width, width * image.height // max(image.width, 1)))
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=80, optimize=True)
+        self._write(name, buffer.getvalue())
+        return name
+
+    def get(self, url, photo_time, width=None):
+        """
+        Return the local URL of a camera photo, downloading it if this PhotoTime is not cached yet.
+
+        Args:
+            url (str): Upstream PhotoUrl.
+            photo_time (str): PhotoTime of the photo, a new value means a new image upstream.
+            width (int): Optional thumbnail width in pixels.
+
+        Returns:
+            str: Path under `url_prefix`, to be used in Markdown images.
+        """
+        with self._lock:
+            if self._files is None:
+                self._load()
+        key = hashlib.sha1(f"{url}|{photo_time}".encode()).hexdigest()[:20]
+
+        with self._key_lock(key):
+            if key + ".jpg" not in self._files:
+                self._fetch(url, key)
+            self._latest[url] = key
+            name = key + ".jpg"
+            if width:
+                thumbnail = f"{key}_w{width}.jpg"
+                name = thumbnail if thumbnail in self._files else self._thumbnail(key, width)
+            self._touch(name)
+        return f"{self.url_prefix}/{name}"
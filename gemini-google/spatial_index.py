@@ -0,0 +1,157 @@
+import heapq
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometers between two WGS84 points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid for radius and nearest-neighbor lookups.
+
+    Points are bucketed into cells of `cell_deg` degrees, so a query only looks at
+    the handful of cells around it instead of every row. The index is kept in sync
+    with a feed through `sync`, which only touches points that were added, moved
+    or removed since the last refresh.
+
+    Args:
+        cell_deg (float): Size of a grid cell in degrees. 0.05 is roughly 5 km north-south.
+    """
+
+    def __init__(self, cell_deg=0.05):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def _insert(self, key, lat, lon):
+        self._points[key] = (lat, lon)
+        self._cells.setdefault(self._cell(lat, lon), set()).add(key)
+
+    def _remove(self, key):
+        lat, lon = self._points.pop(key)
+        cell = self._cell(lat, lon)
+        bucket = self._cells[cell]
+        bucket.discard(key)
+        if not bucket:
+            del self._cells[cell]
+
+    def sync(self, points):
+        """
+        Bring the index in line with `points`, a dict of key -> (lat, lon).
+
+        Returns:
+            tuple: Number of (added, removed) keys, moved points count as both.
+        """
+        added = removed = 0
+        with self._lock:
+            for key in [key for key in self._points if key not in points]:
+                self._remove(key)
+                removed += 1
+            for key, position in points.items():
+                current = self._points.get(key)
+                if current == position:
+                    continue
+                if current is not None:
+                    self._remove(key)
+                    removed += 1
+                self._insert(key, *position)
+                added += 1
+        return added, removed
+
+    def position(self, key):
+        return self._points.get(key)
+
+    def _ring(self, cell, radius):
+        """Cells at exactly Chebyshev distance `radius` from `cell`."""
+        row, col = cell
+        if radius == 0:
+            yield cell
+            return
+        for dc in range(-radius, radius + 1):
+            yield row - radius, col + dc
+            yield row + radius, col + dc
+        for dr in range(-radius + 1, radius):
+            yield row + dr, col - radius
+            yield row + dr, col + radius
+
+    def _ring_min_km(self, lat, radius):
+        """Lower bound on the distance to any point in a ring `radius` cells away."""
+        if radius == 0:
+            return 0.0
+        km_per_deg_lon = KM_PER_DEGREE_LAT * max(math.cos(math.radians(abs(lat) + radius * self.cell_deg)), 0.01)
+        return (radius - 1) * self.cell_deg * min(KM_PER_DEGREE_LAT, km_per_deg_lon)
+
+    def within(self, lat, lon, radius_km):
+        """
+        Keys within `radius_km` of (lat, lon), closest first.
+
+        Returns:
+            list: (distance_km, key) tuples.
+        """
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        lon_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        row_min, col_min = self._cell(lat - lat_span, lon - lon_span)
+        row_max, col_max = self._cell(lat + lat_span, lon + lon_span)
+
+        hits = []
+        with self._lock:
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    for key in self._cells.get((row, col), ()):
+                        distance = haversine_km(lat, lon, *self._points[key])
+                        if distance <= radius_km:
+                            hits.append((distance, key))
+        hits.sort()
+        return hits
+
+    def nearest(self, lat, lon, k=1, predicate=None):
+        """
+        The `k` keys closest to (lat, lon), searching outwards ring by ring.
+
+        Args:
+            predicate (callable): Optional filter on keys, e.g. to skip inactive cameras.
+
+        Returns:
+            list: (distance_km, key) tuples, closest first.
+        """
+        best = []
+        center = self._cell(lat, lon)
+        with self._lock:
+            if not self._cells:
+                return []
+            rows = [row for row, _ in self._cells]
+            cols = [col for _, col in self._cells]
+            max_radius = max(
+                abs(center[0] - min(rows)), abs(center[0] - max(rows)),
+                abs(center[1] - min(cols)), abs(center[1] - max(cols)),
+            )
+            for radius in range(max_radius + 1):
+                if len(best) == k and -best[0][0] < self._ring_min_km(lat, radius):
+                    break
+                for cell in self._ring(center, radius):
+                    for key in self._cells.get(cell, ()):
+                        if predicate is not None and not predicate(key):
+                            continue
+                        distance = haversine_km(lat, lon, *self._points[key])
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, key))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, key))
+        return sorted((-negative, key) for negative, key in best)
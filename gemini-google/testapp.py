@@ -1,35 +1,194 @@
 import os
 import flet as ft
-import google.generativeai as genai
-import random
-from transcriber import produce_voice
-import numpy as np
-import sounddevice as sd
 import threading
 import queue
-import requests
-import pandas as pd
-import numpy as np
-from typing import List
-from fuzzywuzzy import process
 import json
-from api_calls import police_feed, trafikverket_call
+from datetime import datetime, timedelta
+from typing import List
+from zoneinfo import ZoneInfo
+from chat_panel import ChatPanel
+from singleflight import SingleFlight
+from spatial_index import GridIndex
+from image_cache import ImageCache
+from event_series import HourlyEventCounts, lttb
+from event_aggregates import EventAggregates
+from transcription_service import get_transcription_service
+from text_index import InvertedIndex
+# Provider SDKs, pandas/numpy, the audio stack and the feeds are imported or fetched on first use
 # from tools_gemini_functions import get_traffic_data, get_cameras, get_police_events
 
 
-def get_closest_match(query, choices):
+_feeds = {}
+# Sessions that ask for the same feed at the same time share one upstream fetch
+feed_calls = SingleFlight.group("feeds")
+
+
+def _fetch_feed(name):
+    from api_calls import police_feed, trafikverket_call
+
+    fetch = {"police": police_feed, "traffic": trafikverket_call}[name]
+    data = fetch()
+    index_feed(name, data)
+    _feeds[name] = data
+
+
+def load_feed(name, refresh=False):
+    """
+    Fetch a feed the first time it is needed and share it for the rest of the process.
+
+    Args:
+        name (str): "police" for the Polisen events or "traffic" for the Trafikverket cameras.
+        refresh (bool): Fetch the feed again even if it is already loaded.
+
+    Returns:
+        pd.DataFrame: The feed data.
+    """
+    if refresh or name not in _feeds:
+        feed_calls.do(name, _fetch_feed, name)
+    return _feeds[name]
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+CAMERA_THUMBNAIL_WIDTH = 640
+
+# Camera photos are fetched once per PhotoTime and served locally from the Flet assets dir
+camera_images = ImageCache(os.path.join(ASSETS_DIR, "camera_cache"), url_prefix="/camera_cache")
+
+
+def cached_camera_image(photo_url, photo_time, has_full_size=False):
+    """
+    Local URL of a camera photo thumbnail, falls back to the upstream URL if the download fails.
+    """
+    url = photo_url + "?type=fullsize" if has_full_size else photo_url
+    try:
+        return camera_images.get(url, photo_time, width=CAMERA_THUMBNAIL_WIDTH)
+    except Exception:
+        return url
+
+
+# Hourly police event counts for the time-series panel, shared by every session
+event_counts = HourlyEventCounts()
+# The police feed dates its events in Swedish local time
+STOCKHOLM = ZoneInfo("Europe/Stockholm")
+# Counts by type x location x day, so statistics questions never need the raw events
+event_aggregates = EventAggregates()
+# Full-text index over the event names and summaries
+event_text_index = InvertedIndex()
+
+police_index = GridIndex()
+camera_index = GridIndex()
+_police_records = {}
+_camera_records = {}
+_places = {}
+
+
+def _parse_gps(value):
+    """Polisen positions look like "59.329324,18.068581" (lat,lon)."""
+    try:
+        lat, lon = str(value).split(",")
+        return float(lat), float(lon)
+    except ValueError:
+        return None
+
+
+def _parse_wgs84(value):
+    """Trafikverket positions look like "POINT (18.068581 59.329324)" (lon lat)."""
+    try:
+        lon, lat = str(value).strip().removeprefix("POINT").strip(" ()").split()
+        return float(lat), float(lon)
+    except ValueError:
+        return None
+
+
+def index_feed(name, data):
+    """
+    Refresh the spatial index and the compact row records for a freshly fetched feed.
+    Only events and cameras that were added, moved or dropped change the index.
+    """
+    positions = {}
+    if name == "police":
+        records = {}
+        rows = data.to_dict("records")
+        for row in rows:
+            # Every event gets a record for the text search, only the ones with a position are indexed spatially
+            records[row["id"]] = {
+                "id": row["id"],
+                "datetime": str(row.get("datetime")),
+                "type": row.get("type"),
+                "name": row.get("name"),
+                "summary": row.get("summary"),
+                "location": row.get("location.name"),
+            }
+            position = _parse_gps(row.get("location.gps"))
+            if position is None:
+                continue
+            positions[row["id"]] = position
+            _places.setdefault(row.get("location.name"), position)
+        # Records go in before the indexes and stale ones leave after them, so lookups never miss
+        _police_records.update(records)
+        police_index.sync(positions)
+        event_text_index.sync({
+            row["id"]: f"{row.get('name') or ''}. {row.get('summary') or ''}"
+            for row in rows
+        })
+        for key in [key for key in _police_records if key not in records]:
+            del _police_records[key]
+
+        import pandas as pd
+
+        timestamps = pd.to_datetime(data["datetime"], utc=True, errors="coerce")
+        event_counts.ingest(
+            (key, timestamp.timestamp(), kind)
+            for key, timestamp, kind in zip(data["id"], timestamps, data["type"])
+            if not pd.isna(timestamp)
+        )
+        # The feed's datetime starts with the local date, e.g. "2024-10-19 7:40:12 +02:00"
+        event_aggregates.ingest(
+            (key, kind, location, str(when)[:10])
+            for key, kind, location, when in zip(data["id"], data["type"], data["location.name"], data["datetime"])
+        )
+    elif name == "traffic":
+        records = {}
+        for row in data.to_dict("records"):
+            position = _parse_wgs84(row.get("Geometry.WGS84"))
+            if position is None:
+                continue
+            key = row.get("Id", row.get("Name"))
+            positions[key] = position
+            records[key] = {
+                "name": row.get("Name"),
+                "active": bool(row.get("Active")),
+                "photo_time": str(row.get("PhotoTime")),
+                "photo_url": row.get("PhotoUrl"),
+                "has_full_size": bool(row.get("HasFullSizePhoto")),
+            }
+            _places.setdefault(row.get("Name"), position)
+        # Records go in before the index and stale ones leave after it, so lookups never miss
+        _camera_records.update(records)
+        camera_index.sync(positions)
+        for key in [key for key in _camera_records if key not in records]:
+            del _camera_records[key]
+
+
+def get_closest_match(query, choices, score_cutoff=None):
     """
     Find the closest match for the query in the list of choices using fuzzy matching.
     
     Args:
         query (str): The query string to match.
         choices (list of str): The list of possible matches.
+        score_cutoff (int): Minimum score (0-100) for a match. No cutoff if None.
         
     Returns:
-        str: The closest matching string from choices.
+        str: The closest matching string from choices, or None if no choice reaches score_cutoff.
     """
-    match, score = process.extractOne(query, choices)
-    return match
+    from fuzzywuzzy import process
+
+    if score_cutoff is None:
+        match, score = process.extractOne(query, choices)
+        return match
+    best = process.extractOne(query, choices, score_cutoff=score_cutoff)
+    return best[0] if best else None
     
 def get_police_events(crime_type: List[str]=[], location_name: List[str]=[], crime_date: List[str]=[]):
     """
@@ -45,8 +204,9 @@ def get_police_events(crime_type: List[str]=[], location_name: List[str]=[], cri
     Returns:
         filtered_data: a filtered dataframe
     """
-    global police_events
-    police_df = police_events.copy().drop(columns="id")
+    import pandas as pd
+
+    police_df = load_feed("police").copy().drop(columns="id")
     
     if crime_type:
         police_df = police_df[police_df.type.isin(crime_type)]
@@ -63,19 +223,122 @@ def get_police_events(crime_type: List[str]=[], location_name: List[str]=[], cri
     return police_df.to_json(force_ascii=False)
 
 
+def search_police_events(query: str, top_k: int=5) -> str:
+    """
+    Free-text search over the police events, ranked by relevance. Use this for questions like
+    "anything about a stolen car near Malmö central" instead of fetching all police events.
+    The events are written in Swedish, so search with Swedish words, e.g. "stöld bil Malmö centralstation".
+
+    Args:
+        query: The words to search for.
+        top_k: How many events to return.
+
+    Returns:
+        A JSON list of the best matching events with a score and a snippet of the matching text.
+    """
+    # Function calling passes numbers as floats, e.g. 5.0
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        return json.dumps({"error": f"top_k must be a whole number, got {top_k!r}"})
+    if top_k < 1:
+        return json.dumps({"error": f"top_k must be at least 1, got {top_k}"})
+
+    load_feed("police")
+
+    events = []
+    for score, key in event_text_index.search(query, k=top_k):
+        record = _police_records.get(key, {"id": key})
+        events.append({
+            "id": key,
+            "datetime": record.get("datetime"),
+            "type": record.get("type"),
+            "location": record.get("location"),
+            "name": record.get("name"),
+            "score": round(score, 3),
+            "snippet": event_text_index.snippet(key, query),
+        })
+    return json.dumps(events, ensure_ascii=False, default=str)
+
+
+# Below this fuzzy score a crime type is reported as unknown instead of counting an unrelated type
+CRIME_TYPE_SCORE_CUTOFF = 80
+
+
+def get_police_statistics(group_by: List[str]=["type"], crime_type: List[str]=[], location_name: List[str]=[],
+                          date_from: str="", date_to: str="", top_k: int=10) -> str:
+    """
+    Counts police events without fetching them. Use this instead of get_police_events for questions
+    like "how many burglaries in Stockholm this week" or "which crimes are most common in Malmö".
+    The counts are precomputed per crime type, location and day. Crime types that do not match
+    a known type are reported as an error together with the known types.
+
+    Args:
+        group_by: What to count per, any of "type", "location" and "day". An empty list only gives the total.
+        crime_type: The types of crime to count. If empty all types are counted.
+        location_name: The locations to count. If not defined exactly, the most similar location is used.
+        date_from: First date to count from, in the format YYYY-MM-DD. Empty means no lower bound.
+        date_to: Last date to count, in the format YYYY-MM-DD. Empty means no upper bound.
+        top_k: How many of the largest groups to return.
+
+    Returns:
+        A JSON object with the total count and the largest groups with their counts.
+    """
+    # Function calling passes numbers as floats, e.g. 10.0
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        return json.dumps({"error": f"top_k must be a whole number, got {top_k!r}"})
+    if top_k < 1:
+        return json.dumps({"error": f"top_k must be at least 1, got {top_k}"})
+
+    load_feed("police")
+
+    matched_types = []
+    if crime_type:
+        known_types = event_aggregates.types()
+        matched_types = [get_closest_match(kind, known_types, CRIME_TYPE_SCORE_CUTOFF) for kind in crime_type]
+        unknown_types = [kind for kind, match in zip(crime_type, matched_types) if match is None]
+        if unknown_types:
+            return json.dumps(
+                {"error": f"Unknown crime type: {', '.join(unknown_types)}", "known_types": known_types},
+                ensure_ascii=False,
+            )
+
+    matched_locations = []
+    if location_name:
+        known_locations = event_aggregates.locations()
+        matched_locations = [get_closest_match(loc, known_locations) for loc in location_name]
+
+    try:
+        result = event_aggregates.query(
+            group_by=group_by,
+            types=matched_types,
+            locations=matched_locations,
+            date_from=date_from or None,
+            date_to=date_to or None,
+            top_k=top_k,
+        )
+    except (TypeError, ValueError) as e:
+        return json.dumps({"error": str(e)})
+    result["filters"] = {"crime_type": matched_types, "location_name": matched_locations}
+    return json.dumps(result, ensure_ascii=False)
+
+
 def get_cameras():
     """
     This allows the requester to get a list of all available cameras if they do not know which camera they want.
     You must provide them with a cleaned up version of the returned list such that it works in a Markdown setting.
 
     """
+    olyckor = load_feed("traffic")
     return olyckor.Name.sort_values().unique().tolist()
 
 
 def get_traffic_data(camera: str, date_to_filter: str) -> str:
     """
     Allows the requester to grab image from Trafikverket cameras and filter on date.
-    This utilizes an API call which has been pre-fetched and stored in a pandas dataframe called 'olyckor'.
+    This utilizes an API call which is fetched once and stored in a pandas dataframe called 'olyckor'.
     The user can define which camera and which date they want to filter.
     You must display the image by using Markdown, for instance ![The Camera](URL_OF_THE_IMAGE). The URL is returned by this function.
     If you did not find the camera location you must tell the user that you didn't find it and that you chose a random location for them.
@@ -86,10 +349,13 @@ def get_traffic_data(camera: str, date_to_filter: str) -> str:
 
 
     Returns:
-        The URL of the image.
+        The URL of the image, a locally cached and resized copy of the camera photo.
     """
-    global olyckor
-    olyckor = olyckor[olyckor.Active == True]
+    import numpy as np
+    import pandas as pd
+
+    olyckor = load_feed("traffic")
+    olyckor = olyckor[olyckor.Active == True].copy()
     olyckor["PhotoTime"] = pd.to_datetime(olyckor["PhotoTime"], utc=True)
     olyckor['PhotoTime'] = olyckor.PhotoTime.dt.strftime('%Y-%m-%d %H:%M')
 
@@ -101,49 +367,171 @@ def get_traffic_data(camera: str, date_to_filter: str) -> str:
 
         vg = olyckor[olyckor.Name == matched_cameras]
         vg = vg[vg["PhotoTime"] > date_to_filter]
-        vg["PhotoUrl"] = np.where(vg.HasFullSizePhoto == True, vg.PhotoUrl+"?type=fullsize", vg.PhotoUrl)
-        return vg["PhotoUrl"].iloc[0]
     
     else:
         # INSTRUCTION: TELL THE USER THAT YOU DID NOT FIND THE CAMERA LOCATION THEY DESIRED SO YOU GRABBED A RANDOM ONE
         random_camera = np.random.choice(AVAILABLE_CAMERAS)
         vg = olyckor[olyckor.Name == random_camera]
         vg = vg[vg["PhotoTime"] > date_to_filter]
-        vg["PhotoUrl"] = np.where(vg.HasFullSizePhoto == True, vg.PhotoUrl+"?type=fullsize", vg.PhotoUrl)
-        return vg["PhotoUrl"].iloc[0]
 
-df = pd.DataFrame({"time": [1,2,3,4,5,6], "stock_price": [273, 434, 323, 389, 500, 280]})
+    photo = vg.iloc[0]
+    return cached_camera_image(photo.PhotoUrl, photo.PhotoTime, photo.HasFullSizePhoto == True)
+
+
+def get_events_near(place: str, radius_km: float = 5.0) -> str:
+    """
+    Finds police events within a radius of a place, closest first. Use this for questions like
+    "what happened within 10 km of Malmö" instead of fetching all police events.
+    The place can be a town, a police event location or a Trafikverket camera name.
+
+    Args:
+        place: Name of the place to search around. The closest known place name is used.
+        radius_km: Search radius in kilometers.
+
+    Returns:
+        A JSON list of events with their distance in km, the matched place and its position.
+    """
+    load_feed("police")
+    load_feed("traffic")
+    matched_place = get_closest_match(place, list(_places))
+    lat, lon = _places[matched_place]
+
+    events = [
+        dict(_police_records[key], distance_km=round(distance, 2))
+        for distance, key in police_index.within(lat, lon, radius_km)
+    ]
+    return json.dumps(
+        {"place": matched_place, "position": [lat, lon], "events": events},
+        ensure_ascii=False,
+    )
+
+
+def get_nearest_cameras(event_id: int, count: int = 3) -> str:
+    """
+    Finds the active Trafikverket cameras closest to a police event, for instance to look at the
+    traffic around an accident. The event id is the "id" returned by get_events_near.
+    You must display the images by using Markdown, for instance ![The Camera](URL_OF_THE_IMAGE).
+
+    Args:
+        event_id: The id of the police event.
+        count: How many cameras to return.
+
+    Returns:
+        A JSON list of cameras with their distance in km, photo time and image URL.
+    """
+    load_feed("police")
+    load_feed("traffic")
+    position = police_index.position(event_id)
+    if position is None:
+        return json.dumps({"error": f"No police event with id {event_id}"})
+
+    cameras = []
+    for distance, key in camera_index.nearest(
+        *position, k=count, predicate=lambda key: _camera_records[key]["active"]
+    ):
+        record = _camera_records[key]
+        cameras.append({
+            "name": record["name"],
+            "distance_km": round(distance, 2),
+            "photo_time": record["photo_time"],
+            "image_url": cached_camera_image(record["photo_url"], record["photo_time"], record["has_full_size"]),
+        })
+    return json.dumps(cameras, ensure_ascii=False)
+
+
 NYCKELN = os.environ.get('GOOGLE_API_KEY')
 
 class TimeSeries(ft.UserControl):
-    def __init__(self):
-        self.data_points = []
-        self.points = df
+    """
+    Police events per hour over the last weeks, optionally for a single event type.
+
+    The series is read from the shared hourly counts and downsampled with LTTB to the
+    chart width. On refresh only the data points that actually changed are touched,
+    so Flet sends a small delta instead of the whole chart. Refreshes from different
+    threads, e.g. the page load and a refresh click, run one at a time.
+    """
+
+    def __init__(self, counts, width_px=600):
+        super().__init__(expand=True)
+        self.counts = counts
+        self.width_px = width_px
+        self.kind = None
+        self._lock = threading.Lock()
 
+        self.series = ft.LineChartData(data_points=[], stroke_width=2, color=ft.colors.LIGHT_BLUE)
         self.chart = ft.LineChart(
+            data_series=[self.series],
             tooltip_bgcolor = ft.colors.with_opacity(0.7, ft.colors.WHITE),
             expand=True,
-            min_y = min(df.stock_price),
-            max_y = max(df.stock_price),
-            min_x = min(df.time),
-            max_x = max(df.time),
+            min_y = 0,
             left_axis = ft.ChartAxis(labels_size=50),
-            bottom_axis = ft.ChartAxis(labels_size=40, labels_interval=1)
+            bottom_axis = ft.ChartAxis(labels_size=40)
+        )
+        self.type_picker = ft.Dropdown(
+            options=[ft.dropdown.Option("All")],
+            value="All",
+            width=220,
+            on_change=self.on_type_change,
         )
 
     def build(self):
-        self.chart.data_series = []
         return ft.Column(
             horizontal_alignment = "center",
             controls=[
-                ft.Text("Test graph", size=16, weight="bold"),
+                ft.Row([ft.Text("Police events per hour", size=16, weight="bold"), self.type_picker]),
                 self.chart,
             ]
         )
 
+    def on_type_change(self, e):
+        self.kind = None if self.type_picker.value == "All" else self.type_picker.value
+        self.refresh()
+
+    def _day_labels(self, first_hour, last_hour):
+        # Ticks sit on Stockholm midnights, so the dates agree with the feed's local days
+        step = timedelta(days=1 if last_hour - first_hour <= 7 * 24 else 7)
+        day = datetime.fromtimestamp(first_hour * 3600, tz=STOCKHOLM).date() + timedelta(days=1)
+        labels = []
+        while True:
+            hour = int(datetime.combine(day, datetime.min.time(), tzinfo=STOCKHOLM).timestamp()) // 3600
+            if hour > last_hour:
+                return labels
+            labels.append(ft.ChartAxisLabel(value=hour, label=ft.Text(day.strftime("%d/%m"), size=10)))
+            day += step
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        points = lttb(self.counts.series(self.kind), self.width_px)
+        data_points = self.series.data_points
+
+        for i, (x, y) in enumerate(points):
+            if i < len(data_points):
+                point = data_points[i]
+                if point.x != x or point.y != y:
+                    point.x, point.y = x, y
+            else:
+                data_points.append(ft.LineChartDataPoint(x, y))
+        del data_points[len(points):]
+
+        if points:
+            first_hour, last_hour = points[0][0], points[-1][0]
+            if (self.chart.min_x, self.chart.max_x) != (first_hour, last_hour):
+                self.chart.min_x, self.chart.max_x = first_hour, last_hour
+                self.chart.bottom_axis.labels = self._day_labels(first_hour, last_hour)
+            self.chart.max_y = max(max(y for _, y in points), 1)
+
+        options = ["All"] + self.counts.types()
+        if [option.key for option in self.type_picker.options] != options:
+            self.type_picker.options = [ft.dropdown.Option(option) for option in options]
+
+        if self.page is not None:
+            self.update()
+
 
 async def main(page: ft.Page):
-    chart = TimeSeries()
     is_mobile = False
 
     def detect_mobile(e):
@@ -169,6 +557,9 @@ async def main(page: ft.Page):
         on_microphone_click = on_microphone_click
 
     def handle_audio_data(e):
+        import base64
+        import numpy as np
+
         audio_data = base64.b64decode(e.data.split(',')[1])
         audio_array = np.frombuffer(audio_data, dtype=np.float32)
         process_audio(audio_array)
@@ -205,28 +596,41 @@ async def main(page: ft.Page):
     }
     """
 
-    global olyckor
-    global police_events
-    olyckor = trafikverket_call()
-    police_events = police_feed()
-    
+    chatdialog = None
 
-    genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+    def get_chat():
+        # The Gemini SDK is loaded and the chat started when the first message is sent
+        nonlocal chatdialog
+        if chatdialog is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+
+            helper_fns = [
+                get_traffic_data, get_cameras, get_police_events,
+                get_events_near, get_nearest_cameras, get_police_statistics,
+                search_police_events,
+            ]
+            model = genai.GenerativeModel('gemini-1.5-flash-002',tools=helper_fns)
+            history = []
+            chatdialog = model.start_chat(history=history, enable_automatic_function_calling=True)
+        return chatdialog
 
-    helper_fns = [get_traffic_data, get_cameras, get_police_events]
-    model = genai.GenerativeModel('gemini-1.5-flash-002',tools=helper_fns)
-    history = []
-    chatdialog = model.start_chat(history=history, enable_automatic_function_calling=True)
     page.title = "Dashboard App"
     page.theme_mode = ft.ThemeMode.DARK
     page.scroll = "adaptive"
 
-    def generate_random_data(num_points=10):
-        return [random.randint(0, 100) for _ in range(num_points)]
-
-    def update_chart(e):
-        chart.data = generate_random_data()
-        page.update()
+    def update_chart(e=None):
+        # A click fetches the feed again, the first call only loads it if no session has yet
+        try:
+            load_feed("police", refresh=e is not None)
+        except Exception as error:
+            api_feed_icon.tooltip = f"Refresh API Feed (last refresh failed: {error})"
+        else:
+            chart.refresh()
+            counts = feed_calls.counts()
+            api_feed_icon.tooltip = f"Refresh API Feed ({counts['coalesced']} of {counts['calls']} fetches coalesced)"
+        api_feed_icon.update()
 
     menubar = ft.AppBar(
         leading=ft.IconButton(icon=ft.icons.MENU),
@@ -236,17 +640,11 @@ async def main(page: ft.Page):
 
     api_feed_icon = ft.IconButton(
         icon=ft.icons.REFRESH,
-        on_click=update_chart,
+        on_click=lambda e: threading.Thread(target=update_chart, args=(e,), daemon=True).start(),
         tooltip="Refresh API Feed",
     )
 
-    chart = ft.LineChart(
-        data=generate_random_data(),
-        width=300,
-        height=200,
-        tooltip_bgcolor=ft.colors.with_opacity(0.8, ft.colors.WHITE),
-        expand=True,
-    )
+    chart = TimeSeries(event_counts)
 
     gauge = ft.ProgressRing(
         value=0.5,
@@ -273,17 +671,17 @@ async def main(page: ft.Page):
     )
 
     def on_message(message):
-        chat.controls.append(ft.Markdown(f"Gemini: {message}"))
-        page.update()
+        chat.add_markdown(f"Gemini: {message}")
 
     def send_message(e):
         user_message = chat_input.value
         if user_message:
-            chat.controls.append(ft.Text(f"You: {user_message}"))
+            chat.add_text(f"You: {user_message}")
             chat_input.value = ""
-            page.update()
+            chat_input.update()
+            chat.flush()
 
-            response = chatdialog.send_message(user_message)
+            response = get_chat().send_message(user_message)
             on_message(response.text)
 
 
@@ -328,11 +726,15 @@ async def main(page: ft.Page):
             audio_thread.join()
 
     def record_audio():
+        import sounddevice as sd
+
         with sd.InputStream(callback=audio_callback, channels=1, samplerate=SAMPLE_RATE):
             while recording:
                 sd.sleep(100)
 
     def get_audio_array():
+        import numpy as np
+
         audio_data = []
         while not audio_queue.empty():
             audio_data.append(audio_queue.get())
@@ -342,6 +744,24 @@ async def main(page: ft.Page):
     
 
 
+    def handle_transcription(transcription):
+        try:
+            audiotranslation = transcription.result()
+        except Exception as e:
+            chat.add_text(f"Transcription failed: {e}")
+            return
+        finally:
+            if not recording:
+                microphone_button.tooltip = f"Start recording ({get_transcription_service().describe_metrics()})"
+        chat.add_text(f"Transcription: {audiotranslation}")
+        user_message = audiotranslation
+        if user_message:
+            # chat.add_text(f"You: {user_message}")
+            chat_input.value = ""
+            page.update()
+            response = get_chat().send_message(user_message)
+            on_message(response.text)
+
     def on_microphone_click(e):
         nonlocal recording
         if not recording:
@@ -355,21 +775,17 @@ async def main(page: ft.Page):
             # global audio_array
             audio_array = get_audio_array()
             if audio_array is not None:
-                # Here you would typically send this numpy array to your transcriber
-                # For demonstration, we'll just add a message to the chat
-                # global audiotranslation
-                audiotranslation = produce_voice(audio_array)
-                chat.controls.append(ft.Text(f"Transcription: {audiotranslation}"))
-                user_message = audiotranslation
-                if user_message:
-                    # chat.controls.append(ft.Text(f"You: {user_message}"))
-                    chat_input.value = ""
-                    page.update()
-                    response = chatdialog.send_message(user_message)
-                    on_message(response.text)
+                # The shared transcription pool does the work, the UI thread only queues the clip
+                try:
+                    transcription = get_transcription_service().transcribe(audio_array, SAMPLE_RATE)
+                except queue.Full:
+                    chat.add_text("Transcription is busy, please try again")
+                else:
+                    chat.add_text("Transcribing...")
+                    threading.Thread(target=handle_transcription, args=(transcription,), daemon=True).start()
 
             else:
-                chat.controls.append(ft.Text("No audio recorded"))
+                chat.add_text("No audio recorded")
         page.update()
 
     page.on_web_event = handle_audio_data
@@ -380,13 +796,14 @@ async def main(page: ft.Page):
         on_click=on_microphone_click,
     )
 
-    chat = ft.Column(scroll=ft.ScrollMode.AUTO)
+    # Virtualized chat log, keeps at most 200 live controls and batches updates
+    chat = ChatPanel(max_live=200)
     chat_input = ft.TextField(hint_text="Type a message...", expand=True, on_submit=send_message)
     send_button = ft.IconButton(icon=ft.icons.SEND, on_click=send_message)
 
     chat_container = ft.Container(
         content=ft.Column([
-            chat,
+            chat.control,
             ft.Row([microphone_button, chat_input, send_button]),
         ]),
         padding=10,
@@ -403,6 +820,11 @@ async def main(page: ft.Page):
         # ft.Row([microphone_button, chat_input, send_button]),
     )
 
+    # Fill the time series once the page is up, without holding back the first render
+    threading.Thread(target=update_chart, daemon=True).start()
+    # Spawn the transcription workers and load their models before the first recording
+    threading.Thread(target=lambda: get_transcription_service().warm_up(), daemon=True).start()
+
     # Detect if running on mobile
     page.on_view_pop = lambda _: page.window_js_eval("""
     window.flutter_inappwebview.callHandler('detect_mobile', /Android|webOS|iPhone|iPad|iPod|BlackBerry|IEMobile|Opera Mini/i.test(navigator.userAgent));
@@ -410,4 +832,5 @@ async def main(page: ft.Page):
 
     page.on_web_event = detect_mobile
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main, assets_dir=ASSETS_DIR)
\ No newline at end of file
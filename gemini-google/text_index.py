@@ -0,0 +1,172 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+VOWELS = "aeiouyäåö"
+TOKEN_PATTERN = re.compile(r"[0-9a-zåäöéü]+")
+
+STOPWORDS = {
+    "och", "i", "på", "en", "ett", "av", "med", "till", "som", "är", "var", "det", "den", "de",
+    "för", "vid", "har", "hade", "om", "efter", "från", "under", "inte", "att", "sig", "men",
+    "kl", "klockan", "ca", "cirka", "ingen", "inga", "eller", "så", "när", "där", "han", "hon",
+    "the", "a", "an", "of", "in", "on", "at", "near", "about", "any", "anything", "and", "or",
+}
+
+# Snowball Swedish suffixes, longest first so the longest match wins
+STEP1_SUFFIXES = sorted([
+    "a", "arna", "erna", "heterna", "orna", "ad", "e", "ade", "ande", "arne", "are", "aste",
+    "en", "anden", "aren", "heten", "ern", "ar", "er", "heter", "or", "as", "arnas", "ernas",
+    "ornas", "es", "ades", "andes", "ens", "arens", "hetens", "erns", "at", "andet", "het", "ast",
+], key=len, reverse=True)
+S_ENDINGS = set("bcdfghjklmnoprtvy")
+STEP2_SUFFIXES = ("dd", "gd", "nn", "dt", "gt", "kt", "tt")
+
+
+def _r1(word):
+    """Start of the Snowball R1 region, never before the third letter."""
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return max(i + 1, 3)
+    return len(word)
+
+
+def stem(word):
+    """
+    Swedish Snowball stemmer, so "bilen", "bilar" and "bilarna" all become "bil".
+    """
+    r1 = _r1(word)
+    region = word[r1:]
+
+    for suffix in STEP1_SUFFIXES:
+        if region.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    else:
+        if region.endswith("s") and len(word) > 1 and word[-2] in S_ENDINGS:
+            word = word[:-1]
+
+    if word[r1:].endswith(STEP2_SUFFIXES):
+        word = word[:-1]
+
+    region = word[r1:]
+    if region.endswith(("lig", "ig", "els")):
+        word = word[:-3] if region.endswith(("lig", "els")) else word[:-2]
+    elif region.endswith("löst"):
+        word = word[:-1]
+    elif region.endswith("fullt"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercased, stopword-free, stemmed terms of `text`."""
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class InvertedIndex:
+    """
+    In-process full-text index with BM25 ranking.
+
+    Documents are added, replaced and removed one at a time, so a feed refresh only
+    re-tokenizes the events whose text actually changed.
+
+    Args:
+        k1 (float): BM25 term frequency saturation.
+        b (float): BM25 length normalisation.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._documents = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _add(self, key, text):
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        self._documents[key] = (text, terms, length)
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[key] = frequency
+
+    def _remove(self, key):
+        _, terms, length = self._documents.pop(key)
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+
+    def sync(self, documents):
+        """
+        Bring the index in line with `documents`, a dict of key -> text.
+
+        Returns:
+            tuple: Number of (indexed, removed) documents, changed text counts as both.
+        """
+        indexed = removed = 0
+        with self._lock:
+            for key in [key for key in self._documents if key not in documents]:
+                self._remove(key)
+                removed += 1
+            for key, text in documents.items():
+                current = self._documents.get(key)
+                if current is not None and current[0] == text:
+                    continue
+                if current is not None:
+                    self._remove(key)
+                    removed += 1
+                self._add(key, text)
+                indexed += 1
+        return indexed, removed
+
+    def search(self, query, k=5):
+        """
+        The `k` best matching documents for `query`.
+
+        Returns:
+            list: (score, key) tuples, best first.
+        """
+        terms = set(tokenize(query))
+        scores = Counter()
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    length = self._documents[key][2]
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[key] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return [(score, key) for key, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1])]
+
+    def snippet(self, key, query, width=12):
+        """
+        A window of about `width` words around the first query term in a document.
+        """
+        with self._lock:
+            text = self._documents[key][0]
+        terms = set(tokenize(query))
+        words = text.split()
+        hit = next(
+            (i for i, word in enumerate(words) if any(stem(token) in terms for token in TOKEN_PATTERN.findall(word.lower()))),
+            0,
+        )
+        start = max(hit - width // 2, 0)
+        end = min(start + width, len(words))
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if end < len(words) else ""
+        return prefix + " ".join(words[start:end]) + suffix
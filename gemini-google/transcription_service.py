@@ -0,0 +1,202 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+_produce_voice = None
+
+
+def _init_worker():
+    """Load the speech model once per worker process."""
+    global _produce_voice
+    from transcriber import produce_voice
+
+    _produce_voice = produce_voice
+
+
+def _warm_up():
+    """No-op job, its only purpose is making the pool spawn and initialize a worker."""
+    return True
+
+
+def _transcribe(name, shape, dtype):
+    """
+    Runs in a worker. The clip is read in place from shared memory, so the audio is
+    never pickled. Returns (text, started_at, processing_seconds).
+    """
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    started_at = time.time()
+    # The parent owns the segment and unlinks it, the worker only borrows it
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        audio = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        text = _produce_voice(audio)
+        del audio
+    finally:
+        shm.close()
+    return text, started_at, time.time() - started_at
+
+
+class _Clip:
+    def __init__(self, shm, shape, dtype, duration):
+        self.shm = shm
+        self.shape = shape
+        self.dtype = dtype
+        self.duration = duration
+        self.enqueued_at = time.time()
+        self.future = Future()
+
+
+class TranscriptionService:
+    """
+    Shared transcription pool for every dashboard session.
+
+    Clips are copied once into shared memory and handed to a bounded pool of worker
+    processes, each holding a warm speech model. Each clip is its own job, so clips
+    that arrive together run on separate workers. Queue wait and real-time factor
+    (processing time over audio length) are tracked for the last `metrics_window` clips.
+
+    Args:
+        max_workers (int): Number of worker processes.
+        max_pending (int): Clips allowed to wait before `transcribe` raises queue.Full.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, metrics_window=200):
+        self.max_workers = max_workers
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # At most one clip queued per worker besides the running ones
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._queue_waits = deque(maxlen=metrics_window)
+        self._real_time_factors = deque(maxlen=metrics_window)
+        self._metrics_lock = threading.Lock()
+
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def warm_up(self):
+        """
+        Spawn every worker and load its model before the first clip arrives.
+        The pool starts processes on submit, one per job while none is idle,
+        so one no-op job per worker brings the whole pool up.
+        """
+        futures = [self._executor.submit(_warm_up) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def describe_metrics(self):
+        """Short human readable summary of `metrics`, e.g. for a tooltip."""
+        metrics = self.metrics()
+        queue_wait = metrics["queue_wait"]
+        real_time_factor = metrics["real_time_factor"]
+        if not queue_wait["count"]:
+            return "no clips transcribed yet"
+        return (
+            f"{queue_wait['count']} clips, queue wait p95 {queue_wait['p95']:.2f} s, "
+            f"real-time factor mean {real_time_factor['mean']:.2f}"
+        )
+
+    def transcribe(self, audio_array, sample_rate):
+        """
+        Queue a clip for transcription.
+
+        Args:
+            audio_array (np.ndarray): The recorded audio.
+            sample_rate (int): Sample rate of the recording, used for the real-time factor.
+
+        Returns:
+            Future: Resolves to the transcribed text.
+        """
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        audio_array = np.ascontiguousarray(audio_array)
+        shm = shared_memory.SharedMemory(create=True, size=max(audio_array.nbytes, 1))
+        np.ndarray(audio_array.shape, dtype=audio_array.dtype, buffer=shm.buf)[...] = audio_array
+        clip = _Clip(shm, audio_array.shape, audio_array.dtype.str, len(audio_array) / sample_rate)
+        try:
+            self._pending.put_nowait(clip)
+        except queue.Full:
+            self._release(clip)
+            raise
+        return clip.future
+
+    def _dispatch(self):
+        while True:
+            self._submit(self._pending.get())
+
+    def _submit(self, clip):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(_transcribe, clip.shm.name, clip.shape, clip.dtype)
+        except Exception as e:
+            self._slots.release()
+            self._release(clip)
+            clip.future.set_exception(e)
+            return
+        future.add_done_callback(lambda done: self._complete(clip, done))
+
+    def _complete(self, clip, done):
+        self._slots.release()
+        self._release(clip)
+        try:
+            text, started_at, seconds = done.result()
+        except Exception as e:
+            clip.future.set_exception(e)
+            return
+
+        with self._metrics_lock:
+            self._queue_waits.append(started_at - clip.enqueued_at)
+            if clip.duration:
+                self._real_time_factors.append(seconds / clip.duration)
+        clip.future.set_result(text)
+
+    @staticmethod
+    def _release(clip):
+        clip.shm.close()
+        clip.shm.unlink()
+
+    @staticmethod
+    def _summary(values):
+        if not values:
+            return {"count": 0}
+        ordered = sorted(values)
+        return {
+            "count": len(ordered),
+            "mean": sum(ordered) / len(ordered),
+            "p95": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+        }
+
+    def metrics(self):
+        """Queue wait (seconds) and real-time factor over the recent clips."""
+        with self._metrics_lock:
+            return {
+                "pending": self._pending.qsize(),
+                "queue_wait": self._summary(self._queue_waits),
+                "real_time_factor": self._summary(self._real_time_factors),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_transcription_service():
+    """The process-wide service, started and warmed up when the first page loads."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TranscriptionService()
+        return _service